@@ -1,4 +1,5 @@
 import os
+from fastapi.concurrency import run_in_threadpool
 
 # OpenAI client
 try:
@@ -16,6 +17,13 @@ class BaseProvider:
 	def generate(self, prompt: str, mode: str = "chat") -> str:
 		raise NotImplementedError
 
+	async def agenerate(self, prompt: str, mode: str = "chat") -> str:
+		# Default: run the blocking call in FastAPI's worker pool so the event loop stays free
+		return await run_in_threadpool(self.generate, prompt, mode)
+
+	async def aclose(self) -> None:
+		pass
+
 class OpenAIProvider(BaseProvider):
 	def __init__(self):
 		api_key = os.getenv("OPENAI_API_KEY")
@@ -23,18 +31,32 @@ class OpenAIProvider(BaseProvider):
 			raise RuntimeError("OPENAI_API_KEY not set")
 		if not openai:
 			raise RuntimeError("openai package not installed")
-		openai.api_key = api_key
+		self._client = openai.OpenAI(api_key=api_key)
+		self._async_client = openai.AsyncOpenAI(api_key=api_key)
 
 	def generate(self, prompt: str, mode: str = "chat") -> str:
 		# Simple ChatCompletion call; adjust model as needed.
 		model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-		resp = openai.ChatCompletion.create(
+		resp = self._client.chat.completions.create(
+			model=model,
+			messages=[{"role": "user", "content": prompt}],
+			max_tokens=600,
+		)
+		return resp.choices[0].message.content.strip()
+
+	async def agenerate(self, prompt: str, mode: str = "chat") -> str:
+		model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+		resp = await self._async_client.chat.completions.create(
 			model=model,
 			messages=[{"role": "user", "content": prompt}],
 			max_tokens=600,
 		)
 		return resp.choices[0].message.content.strip()
 
+	async def aclose(self) -> None:
+		await self._async_client.close()
+		self._client.close()
+
 class GeminiProvider(BaseProvider):
 	def __init__(self):
 		# Google Generative AI uses GOOGLE_API_KEY or service account credentials
@@ -55,4 +77,9 @@ class GeminiProvider(BaseProvider):
 		model = ggen.GenerativeModel('gemini-2.0-flash')
 		# model = ggen.GenerativeModel(model_name)
 		response = model.generate_content(prompt, generation_config={"max_output_tokens": 600})
-		return response.text
\ No newline at end of file
+		return response.text
+
+	async def agenerate(self, prompt: str, mode: str = "chat") -> str:
+		model = ggen.GenerativeModel('gemini-2.0-flash')
+		response = await model.generate_content_async(prompt, generation_config={"max_output_tokens": 600})
+		return response.text
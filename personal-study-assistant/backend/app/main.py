@@ -1,10 +1,14 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import os
+import logging
 from .ai_providers import OpenAIProvider, GeminiProvider
 from dotenv import load_dotenv
 load_dotenv()
 
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI()
@@ -32,18 +36,22 @@ elif PROVIDER in ("gemini", "google"):
 	provider = GeminiProvider()
 else:
 	raise RuntimeError("Unsupported AI_PROVIDER: %s" % PROVIDER)
-print(f"Using AI provider: {PROVIDER}")
+logger.info("Using AI provider: %s", PROVIDER)
 
 @app.post("/api/chat")
 async def chat(req: ChatRequest):
 	try:
-		print(f"Received request: {req}")
-		resp = provider.generate(req.prompt, mode=req.mode)
+		logger.debug("Received request: %s", req)
+		resp = await provider.agenerate(req.prompt, mode=req.mode)
 		return {"ok": True, "provider": PROVIDER, "response": resp}
 	except Exception as e:
-		print(f"Error processing request: {e}")
+		logger.warning("Error processing request: %s", e)
 		raise HTTPException(status_code=500, detail=str(e))
 
+@app.on_event("shutdown")
+async def shutdown():
+	await provider.aclose()
+
 @app.get("/")
 async def landing():
 	return {
@@ -1,47 +1,144 @@
 import os
+import asyncio
+import functools
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+import httpx
+import orjson
 import requests
 import google.generativeai as genai
 from huggingface_hub import InferenceClient
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from semantic_cache import SemanticCache
+
+# Maximum number of responses kept in the in-memory prompt cache
+CACHE_MAX_ENTRIES = 1024
+
+# Static system prompt shared by every provider; keeping it byte-identical
+# across calls lets server-side prefix caching kick in
+SYSTEM_PROMPT = "You are a helpful research assistant. Provide detailed, accurate information with sources when possible."
+
+def _load_api_keys(name: str) -> List[str]:
+    """Read the comma-separated <NAME>_API_KEYS, falling back to <NAME>_API_KEY"""
+    raw = os.getenv(f"{name}_API_KEYS") or os.getenv(f"{name}_API_KEY") or ""
+    return [key.strip() for key in raw.split(",") if key.strip()]
+
+# Shared session for the sync provider calls so keep-alive reuses TLS connections.
+# Transient failures are retried with backoff here instead of surfacing as errors;
+# POST must be allowed explicitly because urllib3 treats it as non-idempotent.
+# Read timeouts are not retried: a slow generation would be re-sent (and billed)
+# again, multiplying the wait instead of failing at the timeout.
+_SESSION = requests.Session()
+_SESSION.headers["Content-Type"] = "application/json"
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=100,
+    max_retries=Retry(
+        total=3,
+        read=0,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["POST"]
+    )
+))
 
 class AIClient:
     def __init__(self):
         """Initialize all AI providers with API keys from environment"""
         self.providers = self._initialize_providers()
         
+        # Resolve availability and per-provider handlers once instead of per request
+        self._available_order = tuple(name for name, config in self.providers.items() if config["enabled"])
+        self._available = frozenset(self._available_order)
+        self._dispatch = {
+            "deepseek": self._query_deepseek,
+            "openai": self._query_openai,
+            "anthropic": self._query_anthropic,
+            "gemini": self._query_gemini,
+            "huggingface": self._query_huggingface
+        }
+        self._adispatch = {
+            "deepseek": self._aquery_deepseek,
+            "openai": self._aquery_openai,
+            "anthropic": self._aquery_anthropic,
+            "gemini": functools.partial(asyncio.to_thread, self._query_gemini),
+            "huggingface": functools.partial(asyncio.to_thread, self._query_huggingface)
+        }
+        self._stream_dispatch = {
+            "deepseek": self._stream_deepseek,
+            "openai": self._stream_openai,
+            "anthropic": self._stream_anthropic,
+            "gemini": self._stream_gemini,
+            "huggingface": self._stream_huggingface
+        }
+        
+        # Shared async HTTP client so concurrent calls reuse pooled connections
+        self._http = httpx.AsyncClient(
+            timeout=30,
+            transport=httpx.AsyncHTTPTransport(
+                retries=3,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+            ),
+            headers={"Content-Type": "application/json"}
+        )
+        
+        # Static payload pieces shared by every request; only the per-call
+        # parts are allocated in the payload builders
+        self._sys_msg = {"role": "system", "content": SYSTEM_PROMPT}
+        self._chat_payload_template = {"temperature": 0.7, "max_tokens": 2000}
+        self._anthropic_system_block = {"type": "text", "text": SYSTEM_PROMPT}
+        self._anthropic_payload_template = {"model": "claude-3-sonnet-20240229", "max_tokens": 2000, "temperature": 0.7}
+        
+        # LRU cache of responses keyed on (provider, query, context)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Optional embedding-similarity cache for rephrased questions
+        self._semantic_cache = None
+        if os.getenv("SEMANTIC_CACHE", "").lower() in ("1", "true", "yes", "on"):
+            self._semantic_cache = SemanticCache()
+        
     def _initialize_providers(self) -> Dict[str, Dict]:
         """Initialize all AI providers with their configurations"""
+        deepseek_keys = _load_api_keys("DEEPSEEK")
+        openai_keys = _load_api_keys("OPENAI")
+        anthropic_keys = _load_api_keys("ANTHROPIC")
+        
         providers = {
             "deepseek": {
                 "name": "DeepSeek",
-                "api_key": os.getenv("DEEPSEEK_API_KEY"),
+                "api_key": next(iter(deepseek_keys), None),
                 "api_url": "https://api.deepseek.com/v1/chat/completions",
-                "headers": {
-                    "Authorization": f"Bearer {os.getenv('DEEPSEEK_API_KEY')}",
-                    "Content-Type": "application/json"
-                },
-                "enabled": bool(os.getenv("DEEPSEEK_API_KEY"))
+                "headers_pool": [
+                    {"Authorization": f"Bearer {key}"}
+                    for key in deepseek_keys
+                ],
+                "enabled": bool(deepseek_keys)
             },
             "openai": {
                 "name": "OpenAI",
-                "api_key": os.getenv("OPENAI_API_KEY"),
+                "api_key": next(iter(openai_keys), None),
                 "api_url": "https://api.openai.com/v1/chat/completions",
-                "headers": {
-                    "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
-                    "Content-Type": "application/json"
-                },
-                "enabled": bool(os.getenv("OPENAI_API_KEY"))
+                "headers_pool": [
+                    {"Authorization": f"Bearer {key}"}
+                    for key in openai_keys
+                ],
+                "enabled": bool(openai_keys)
             },
             "anthropic": {
                 "name": "Anthropic",
-                "api_key": os.getenv("ANTHROPIC_API_KEY"),
+                "api_key": next(iter(anthropic_keys), None),
                 "api_url": "https://api.anthropic.com/v1/messages",
-                "headers": {
-                    "x-api-key": os.getenv("ANTHROPIC_API_KEY"),
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json"
-                },
-                "enabled": bool(os.getenv("ANTHROPIC_API_KEY"))
+                "headers_pool": [
+                    {"x-api-key": key, "anthropic-version": "2023-06-01"}
+                    for key in anthropic_keys
+                ],
+                "enabled": bool(anthropic_keys)
             },
             "gemini": {
                 "name": "Google Gemini",
@@ -56,15 +153,32 @@ class AIClient:
             }
         }
         
+        # Rotate through the configured keys so traffic spreads across their rate limits
+        for config in providers.values():
+            if config.get("headers_pool"):
+                config["headers_cycle"] = itertools.cycle(config["headers_pool"])
+        
         # Configure Gemini if enabled
         if providers["gemini"]["enabled"]:
             genai.configure(api_key=providers["gemini"]["api_key"])
+            providers["gemini"]["model"] = genai.GenerativeModel('gemini-2.0-flash')
+        
+        # Build the Hugging Face client once instead of per request
+        if providers["huggingface"]["enabled"]:
+            providers["huggingface"]["client"] = InferenceClient(
+                model="mistralai/Mixtral-8x7B-Instruct-v0.1",
+                token=providers["huggingface"]["api_key"]
+            )
             
         return providers
     
+    def _next_headers(self, provider: str) -> Dict[str, str]:
+        """Return the prebuilt request headers for the provider's next API key"""
+        return next(self.providers[provider]["headers_cycle"])
+    
     def get_available_providers(self) -> list:
         """Return list of available AI providers"""
-        return [name for name, config in self.providers.items() if config["enabled"]]
+        return list(self._available_order)
     
     def query(self, provider: str, query: str, context: str = "") -> str:
         """
@@ -78,124 +192,315 @@ class AIClient:
         Returns:
             The AI response
         """
-        if provider not in self.get_available_providers():
+        if provider not in self._available:
             return f"Provider '{provider}' is not available."
         
-        if provider == "deepseek":
-            return self._query_deepseek(query, context)
-        elif provider == "openai":
-            return self._query_openai(query, context)
-        elif provider == "anthropic":
-            return self._query_anthropic(query, context)
-        elif provider == "gemini":
-            return self._query_gemini(query, context)
-        elif provider == "huggingface":
-            return self._query_huggingface(query, context)
-        else:
-            return f"Unknown provider: {provider}"
+        key, vector, cached = self._lookup_cached(provider, query, context)
+        if cached is not None:
+            return cached
+        
+        response = self._dispatch[provider](query, context)
+        self._store_cached(key, vector, provider, context, response)
+        return response
     
-    def _query_deepseek(self, query: str, context: str) -> str:
-        """Query DeepSeek API"""
-        messages = [
-            {"role": "system", "content": "You are a helpful research assistant. Provide detailed, accurate information with sources when possible."},
-        ]
+    async def aquery(self, provider: str, query: str, context: str = "") -> str:
+        """
+        Query a specific AI provider without blocking the event loop
         
-        if context:
-            messages.append({"role": "system", "content": f"Context from previous conversation: {context}"})
+        Args:
+            provider: The AI provider to use
+            query: The user's query
+            context: Previous conversation context
             
-        messages.append({"role": "user", "content": query})
+        Returns:
+            The AI response
+        """
+        if provider not in self._available:
+            return f"Provider '{provider}' is not available."
         
-        payload = {
-            "model": "deepseek-chat",
-            "messages": messages,
-            "temperature": 0.7,
-            "max_tokens": 2000
-        }
+        key = self._cache_key(provider, query, context)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        vector = await self._aembed(query)
+        return await self._aquery_miss(provider, query, context, key, vector)
+    
+    def stream(self, provider: str, query: str, context: str = "") -> Iterator[str]:
+        """
+        Stream the response of a specific AI provider as it is generated
+        
+        Args:
+            provider: The AI provider to use
+            query: The user's query
+            context: Previous conversation context
+            
+        Yields:
+            Chunks of the AI response in arrival order
+            
+        Raises:
+            RuntimeError: If the provider is unavailable or fails mid-stream,
+                so callers can tell a partial answer from a complete one
+        """
+        if provider not in self._available:
+            raise RuntimeError(f"Provider '{provider}' is not available.")
+        
+        key, vector, cached = self._lookup_cached(provider, query, context)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        try:
+            for chunk in self._stream_dispatch[provider](query, context):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            raise RuntimeError(f"Error calling {self.providers[provider]['name']} API: {str(e)}") from e
+        
+        self._store_cached(key, vector, provider, context, "".join(chunks))
+    
+    async def aquery_many(self, providers: List[str], query: str, context: str = "") -> Dict[str, str]:
+        """
+        Query several AI providers concurrently
+        
+        Args:
+            providers: The AI providers to use
+            query: The user's query
+            context: Previous conversation context
+            
+        Returns:
+            Mapping of provider name to its response
+        """
+        results = {}
+        misses = []
+        for provider in providers:
+            if provider not in self._available:
+                results[provider] = f"Provider '{provider}' is not available."
+                continue
+            key = self._cache_key(provider, query, context)
+            cached = self._cache_get(key)
+            if cached is not None:
+                results[provider] = cached
+            else:
+                misses.append((provider, key))
+        
+        if misses:
+            # Every provider shares the query, so embed it once before fanning out
+            vector = await self._aembed(query)
+            responses = await asyncio.gather(*(
+                self._aquery_miss(provider, query, context, key, vector) for provider, key in misses
+            ))
+            results.update(zip((provider for provider, _ in misses), responses))
+        return {provider: results[provider] for provider in providers}
+    
+    async def _aquery_miss(self, provider: str, query: str, context: str, key: str, vector: Any) -> str:
+        """Answer a query that missed the exact-match cache"""
+        cached = self._semantic_get(provider, context, vector)
+        if cached is not None:
+            return cached
+        
+        response = await self._adispatch[provider](query, context)
+        self._store_cached(key, vector, provider, context, response)
+        return response
+    
+    def _lookup_cached(self, provider: str, query: str, context: str) -> Tuple[str, Any, Optional[str]]:
+        """Check the exact-match cache, then the semantic cache if enabled"""
+        key = self._cache_key(provider, query, context)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return key, None, cached
+        
+        vector = self._embed(query)
+        return key, vector, self._semantic_get(provider, context, vector)
+    
+    def _embed(self, query: str) -> Any:
+        """Embed a query for the semantic cache, or return None if it is disabled"""
+        if self._semantic_cache is None:
+            return None
+        # None as well when the query is too long to embed faithfully, so only
+        # exact matches are reused
+        return self._semantic_cache.embed(query)
+    
+    async def _aembed(self, query: str) -> Any:
+        """Embed a query in a worker thread so the model's forward pass cannot stall the event loop"""
+        if self._semantic_cache is None:
+            return None
+        return await asyncio.to_thread(self._semantic_cache.embed, query)
+    
+    def _semantic_get(self, provider: str, context: str, vector: Any) -> Optional[str]:
+        """Look up a semantically similar query, if one was embedded"""
+        if vector is None:
+            return None
+        return self._semantic_cache.get(provider, context, vector)
+    
+    def _store_cached(self, key: str, vector: Any, provider: str, context: str, response: str):
+        """Record a fresh response in every enabled cache"""
+        # Never cache failures or blank answers so a retry actually hits the provider again
+        if not isinstance(response, str) or not response.strip() or response.startswith("Error calling"):
+            return
+        
+        self._cache_put(key, response)
+        if vector is not None:
+            self._semantic_cache.put(provider, context, vector, response)
+    
+    def _cache_key(self, provider: str, query: str, context: str) -> str:
+        """Build the prompt cache key for a request"""
+        raw = f"{provider}\x00{query}\x00{context}".encode()
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Return a cached response and mark it as most recently used"""
+        with self._cache_lock:
+            response = self._cache.get(key)
+            if response is not None:
+                self._cache.move_to_end(key)
+            return response
+    
+    def _cache_put(self, key: str, response: str):
+        """Store a response, evicting the least recently used entry when full"""
+        with self._cache_lock:
+            self._cache[key] = response
+            self._cache.move_to_end(key)
+            if len(self._cache) > CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+    
+    async def aclose(self):
+        """Close the shared async HTTP client"""
+        await self._http.aclose()
+    
+    def _chat_payload(self, model: str, query: str, context: str) -> Dict[str, Any]:
+        """Build an OpenAI-compatible chat completions payload"""
+        if context:
+            messages = [
+                self._sys_msg,
+                {"role": "system", "content": f"Context from previous conversation: {context}"},
+                {"role": "user", "content": query}
+            ]
+        else:
+            messages = [self._sys_msg, {"role": "user", "content": query}]
+        
+        return {**self._chat_payload_template, "model": model, "messages": messages}
+    
+    def _anthropic_payload(self, query: str, context: str) -> Dict[str, Any]:
+        """Build an Anthropic messages payload"""
+        if context:
+            system_blocks = [
+                self._anthropic_system_block,
+                {"type": "text", "text": f"Context from previous conversation: {context}"}
+            ]
+        else:
+            system_blocks = [self._anthropic_system_block]
         
+        return {
+            **self._anthropic_payload_template,
+            "system": system_blocks,
+            "messages": [{"role": "user", "content": query}]
+        }
+    
+    def _query_deepseek(self, query: str, context: str) -> str:
+        """Query DeepSeek API"""
         try:
-            response = requests.post(
+            response = _SESSION.post(
                 self.providers["deepseek"]["api_url"],
-                headers=self.providers["deepseek"]["headers"],
-                json=payload,
+                headers=self._next_headers("deepseek"),
+                data=orjson.dumps(self._chat_payload("deepseek-chat", query, context)),
                 timeout=30
             )
             response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
+            return orjson.loads(response.content)["choices"][0]["message"]["content"]
+        except Exception as e:
+            return f"Error calling DeepSeek API: {str(e)}"
+    
+    async def _aquery_deepseek(self, query: str, context: str) -> str:
+        """Query DeepSeek API asynchronously"""
+        try:
+            response = await self._http.post(
+                self.providers["deepseek"]["api_url"],
+                headers=self._next_headers("deepseek"),
+                content=orjson.dumps(self._chat_payload("deepseek-chat", query, context))
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)["choices"][0]["message"]["content"]
         except Exception as e:
             return f"Error calling DeepSeek API: {str(e)}"
     
     def _query_openai(self, query: str, context: str) -> str:
         """Query OpenAI API"""
-        messages = [
-            {"role": "system", "content": "You are a helpful research assistant. Provide detailed, accurate information with sources when possible."},
-        ]
-        
-        if context:
-            messages.append({"role": "system", "content": f"Context from previous conversation: {context}"})
-            
-        messages.append({"role": "user", "content": query})
-        
-        payload = {
-            "model": "gpt-3.5-turbo",
-            "messages": messages,
-            "temperature": 0.7,
-            "max_tokens": 2000
-        }
-        
         try:
-            response = requests.post(
+            response = _SESSION.post(
                 self.providers["openai"]["api_url"],
-                headers=self.providers["openai"]["headers"],
-                json=payload,
+                headers=self._next_headers("openai"),
+                data=orjson.dumps(self._chat_payload("gpt-3.5-turbo", query, context)),
                 timeout=30
             )
             response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
+            return orjson.loads(response.content)["choices"][0]["message"]["content"]
+        except Exception as e:
+            return f"Error calling OpenAI API: {str(e)}"
+    
+    async def _aquery_openai(self, query: str, context: str) -> str:
+        """Query OpenAI API asynchronously"""
+        try:
+            response = await self._http.post(
+                self.providers["openai"]["api_url"],
+                headers=self._next_headers("openai"),
+                content=orjson.dumps(self._chat_payload("gpt-3.5-turbo", query, context))
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)["choices"][0]["message"]["content"]
         except Exception as e:
             return f"Error calling OpenAI API: {str(e)}"
     
     def _query_anthropic(self, query: str, context: str) -> str:
         """Query Anthropic API"""
-        system_message = "You are a helpful research assistant. Provide detailed, accurate information with sources when possible."
-        if context:
-            system_message += f"\n\nContext from previous conversation: {context}"
-        
-        payload = {
-            "model": "claude-3-sonnet-20240229",
-            "max_tokens": 2000,
-            "temperature": 0.7,
-            "system": system_message,
-            "messages": [
-                {"role": "user", "content": query}
-            ]
-        }
-        
         try:
-            response = requests.post(
+            response = _SESSION.post(
                 self.providers["anthropic"]["api_url"],
-                headers=self.providers["anthropic"]["headers"],
-                json=payload,
+                headers=self._next_headers("anthropic"),
+                data=orjson.dumps(self._anthropic_payload(query, context)),
                 timeout=30
             )
             response.raise_for_status()
-            return response.json()["content"][0]["text"]
+            return orjson.loads(response.content)["content"][0]["text"]
+        except Exception as e:
+            return f"Error calling Anthropic API: {str(e)}"
+    
+    async def _aquery_anthropic(self, query: str, context: str) -> str:
+        """Query Anthropic API asynchronously"""
+        try:
+            response = await self._http.post(
+                self.providers["anthropic"]["api_url"],
+                headers=self._next_headers("anthropic"),
+                content=orjson.dumps(self._anthropic_payload(query, context))
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)["content"][0]["text"]
         except Exception as e:
             return f"Error calling Anthropic API: {str(e)}"
     
+    def _prompt_parts(self, query: str, context: str) -> List[str]:
+        """Collect the sections of a plain-text prompt in order"""
+        parts = [SYSTEM_PROMPT]
+        if context:
+            parts.append(f"Context from previous conversation: {context}")
+        parts.append(f"User query: {query}")
+        return parts
+    
+    def _gemini_prompt(self, query: str, context: str) -> str:
+        """Build the plain-text prompt sent to Gemini"""
+        return "\n\n".join(self._prompt_parts(query, context))
+    
+    def _huggingface_prompt(self, query: str, context: str) -> str:
+        """Build the Mixtral instruction prompt sent to Hugging Face"""
+        prompt = "\n\n".join(self._prompt_parts(query, context))
+        return f"<s>[INST] {prompt} [/INST]"
+    
     def _query_gemini(self, query: str, context: str) -> str:
         """Query Google Gemini API"""
         try:
-
-              
-            model = genai.GenerativeModel('gemini-2.0-flash')
-            
-            prompt = "You are a helpful research assistant. Provide detailed, accurate information with sources when possible."
-            if context:
-                prompt += f"\n\nContext from previous conversation: {context}"
-                
-            prompt += f"\n\nUser query: {query}"
-            
-            response = model.generate_content(prompt)
+            prompt = self._gemini_prompt(query, context)
+            response = self.providers["gemini"]["model"].generate_content(prompt)
             return response.text
         except Exception as e:
             return f"Error calling Gemini API: {str(e)}"
@@ -203,18 +508,8 @@ class AIClient:
     def _query_huggingface(self, query: str, context: str) -> str:
         """Query Hugging Face API"""
         try:
-            client = InferenceClient(
-                model="mistralai/Mixtral-8x7B-Instruct-v0.1",
-                token=self.providers["huggingface"]["api_key"]
-            )
-            
-            prompt = "<s>[INST] You are a helpful research assistant. Provide detailed, accurate information with sources when possible."
-            if context:
-                prompt += f"\n\nContext from previous conversation: {context}"
-                
-            prompt += f"\n\nUser query: {query} [/INST]"
-            
-            response = client.text_generation(
+            prompt = self._huggingface_prompt(query, context)
+            response = self.providers["huggingface"]["client"].text_generation(
                 prompt,
                 max_new_tokens=2000,
                 temperature=0.7
@@ -222,4 +517,83 @@ class AIClient:
             
             return response
         except Exception as e:
-            return f"Error calling Hugging Face API: {str(e)}"
\ No newline at end of file
+            return f"Error calling Hugging Face API: {str(e)}"
+    
+    def _sse_events(self, response) -> Iterator[Dict[str, Any]]:
+        """Yield the JSON payloads of a server-sent events response, raising on error events"""
+        for line in response.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+            
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                return
+            event = orjson.loads(data)
+            
+            # Providers can report failures (e.g. Anthropic's overloaded_error)
+            # inside a stream that already returned 200
+            if event.get("type") == "error" or "error" in event:
+                error = event.get("error") or {}
+                message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+                raise RuntimeError(f"Stream error: {message}")
+            yield event
+    
+    def _stream_chat(self, provider: str, payload: Dict[str, Any]) -> Iterator[str]:
+        """Stream an OpenAI-compatible chat completion"""
+        payload["stream"] = True
+        with _SESSION.post(
+            self.providers[provider]["api_url"],
+            headers=self._next_headers(provider),
+            data=orjson.dumps(payload),
+            stream=True,
+            timeout=30
+        ) as response:
+            response.raise_for_status()
+            for event in self._sse_events(response):
+                choices = event.get("choices")
+                if choices:
+                    delta = choices[0]["delta"].get("content")
+                    if delta:
+                        yield delta
+    
+    def _stream_deepseek(self, query: str, context: str) -> Iterator[str]:
+        """Stream a DeepSeek chat completion"""
+        return self._stream_chat("deepseek", self._chat_payload("deepseek-chat", query, context))
+    
+    def _stream_openai(self, query: str, context: str) -> Iterator[str]:
+        """Stream an OpenAI chat completion"""
+        return self._stream_chat("openai", self._chat_payload("gpt-3.5-turbo", query, context))
+    
+    def _stream_anthropic(self, query: str, context: str) -> Iterator[str]:
+        """Stream an Anthropic message"""
+        payload = self._anthropic_payload(query, context)
+        payload["stream"] = True
+        with _SESSION.post(
+            self.providers["anthropic"]["api_url"],
+            headers=self._next_headers("anthropic"),
+            data=orjson.dumps(payload),
+            stream=True,
+            timeout=30
+        ) as response:
+            response.raise_for_status()
+            for event in self._sse_events(response):
+                if event.get("type") == "content_block_delta":
+                    text = event["delta"].get("text")
+                    if text:
+                        yield text
+    
+    def _stream_gemini(self, query: str, context: str) -> Iterator[str]:
+        """Stream a Google Gemini response"""
+        prompt = self._gemini_prompt(query, context)
+        for chunk in self.providers["gemini"]["model"].generate_content(prompt, stream=True):
+            yield chunk.text
+    
+    def _stream_huggingface(self, query: str, context: str) -> Iterator[str]:
+        """Stream a Hugging Face text generation"""
+        prompt = self._huggingface_prompt(query, context)
+        yield from self.providers["huggingface"]["client"].text_generation(
+            prompt,
+            max_new_tokens=2000,
+            temperature=0.7,
+            stream=True
+        )
\ No newline at end of file
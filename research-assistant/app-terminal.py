@@ -2,6 +2,7 @@
 import os
 import sys
 import uuid
+import asyncio
 import tempfile
 import argparse
 from dotenv import load_dotenv
@@ -15,6 +16,28 @@ from document_processor import DocumentProcessor
 # Load environment variables
 load_dotenv()
 
+# The document leads the prompt and the per-turn parts follow it, so repeated
+# questions about one document share a prefix that providers can cache
+DOCUMENT_PROMPT = """Analyze the following document content and answer the user's query.
+
+DOCUMENT CONTENT:
+{document}
+
+PREVIOUS CONVERSATION:
+{context}
+
+USER QUERY: {query}
+
+Please provide a comprehensive analysis based on the document content."""
+
+# Rules used to frame terminal output
+_SEP60 = "-" * 60
+_EQ60 = "=" * 60
+
+# Accepted spellings for /websearch arguments
+_TRUE = frozenset({"on", "yes", "true", "1"})
+_FALSE = frozenset({"off", "no", "false", "0"})
+
 class TerminalResearchAssistant:
     def __init__(self, default_provider="deepseek", use_web_search=False):
         """
@@ -42,60 +65,96 @@ class TerminalResearchAssistant:
         self.use_web_search = use_web_search and self.web_search.is_available()
         self.session_id = str(uuid.uuid4())
         
+        # One event loop for the whole session so pooled connections stay valid
+        self._loop = asyncio.new_event_loop()
+        
+        # Command name -> handler, registered once for the session
+        self._commands = {
+            '/provider': self._cmd_provider,
+            '/websearch': self._cmd_websearch,
+            '/upload': self._cmd_upload,
+            '/compare': self._cmd_compare,
+            '/clear': self._cmd_clear,
+            '/reset': self._cmd_clear,
+            '/quit': self._cmd_quit,
+            '/exit': self._cmd_quit,
+            '/q': self._cmd_quit,
+            '/help': self._cmd_help
+        }
+        
         # Display welcome message
         self._print_welcome()
     
+    def run_async(self, coro):
+        """Run a coroutine to completion on the assistant's event loop"""
+        return self._loop.run_until_complete(coro)
+    
+    def close(self):
+        """Release network resources held by the assistant"""
+        if not self._loop.is_closed():
+            self.run_async(self.ai_client.aclose())
+            self._loop.close()
+    
     def _print_welcome(self):
         """Display welcome message and current settings"""
-        print("\n" + "="*60)
+        print("\n" + _EQ60)
         print("          TERMINAL RESEARCH ASSISTANT")
-        print("="*60)
+        print(_EQ60)
         print(f"Session ID: {self.session_id}")
         print(f"Current AI Provider: {self.current_provider}")
         print(f"Web Search: {'Enabled' if self.use_web_search else 'Disabled'}")
         print(f"Available Providers: {', '.join(self.ai_client.get_available_providers())}")
-        print("="*60)
+        print(_EQ60)
         print("\nCommands:")
         print("  /provider <name>    - Switch AI provider")
         print("  /websearch <on|off> - Toggle web search")
         print("  /upload <file>      - Upload and analyze a document")
+        print("  /compare <query>    - Ask every available provider at once")
         print("  /clear              - Clear conversation history")
         print("  /quit or /exit      - Exit the program")
         print("\nEnter your research question to begin.")
-        print("="*60)
+        print(_EQ60)
     
-    def _print_response(self, response, search_results=None):
+    def _print_response(self, response, search_results=None, title="RESPONSE"):
         """Format and print the AI response"""
-        print("\n" + "-"*60)
-        print("RESPONSE:")
-        print("-"*60)
+        self._print_response_header(title)
         print(response)
-        
+        self._print_response_footer(search_results)
+    
+    def _print_response_header(self, title="RESPONSE"):
+        """Print the banner shown above a response"""
+        sys.stdout.write(f"\n{_SEP60}\n{title}:\n{_SEP60}\n")
+    
+    def _print_response_footer(self, search_results=None):
+        """Print search results (if any) and the closing rule below a response"""
         if search_results:
-            print("\n" + "-"*60)
-            print("SEARCH RESULTS:")
-            print("-"*60)
-            for i, result in enumerate(search_results, 1):
-                print(f"\n{i}. {result['title']}")
-                print(f"   {result['snippet']}")
-                print(f"   URL: {result['link']}")
-                print(f"   Source: {result['source']}")
+            self._print_search_results(search_results)
         
-        print("-"*60)
+        print(_SEP60)
     
-    def process_query(self, query):
-        """Process a research query"""
-        if not query.strip():
-            return
+    def _print_search_results(self, search_results):
+        """Print web search results below a response"""
+        sys.stdout.write(f"\n{_SEP60}\nSEARCH RESULTS:\n{_SEP60}\n")
+        for i, result in enumerate(search_results, 1):
+            print(f"\n{i}. {result['title']}")
+            print(f"   {result['snippet']}")
+            print(f"   URL: {result['link']}")
+            print(f"   Source: {result['source']}")
+    
+    async def _prepare_query(self, query):
+        """Gather conversation context and web search results for a query"""
+        # Start the web search first so its network wait overlaps with the context lookup
+        search_task = None
+        if self.use_web_search:
+            print("Searching the web...", end=" ", flush=True)
+            search_task = asyncio.create_task(self.web_search.asearch(query))
         
         # Get conversation context
         context = self.memory_manager.get_context(self.session_id)
         
-        # Perform web search if enabled
         search_results = []
-        if self.use_web_search:
-            print("Searching the web...", end=" ", flush=True)
-            search_results = self.web_search.search(query)
+        if search_task:
+            search_results = await search_task
             print("Done!")
             
             if search_results:
@@ -103,18 +162,55 @@ class TerminalResearchAssistant:
                 search_context = "\n".join([f"Source: {r['title']}\nContent: {r['snippet']}" for r in search_results])
                 query = f"{query}\n\nHere are some web search results for context:\n{search_context}"
         
-        # Get AI response
-        print(f"Querying {self.current_provider}...", end=" ", flush=True)
-        response = self.ai_client.query(self.current_provider, query, context)
-        print("Done!")
+        return query, context, search_results
+    
+    async def process_query(self, query):
+        """Process a research query"""
+        if not query.strip():
+            return
+        
+        query, context, search_results = await self._prepare_query(query)
+        
+        # Stream the AI response to the terminal as it arrives
+        self._print_response_header()
+        chunks = []
+        try:
+            for chunk in self.ai_client.stream(self.current_provider, query, context):
+                chunks.append(chunk)
+                sys.stdout.write(chunk)
+                sys.stdout.flush()
+        except RuntimeError as e:
+            # A partial answer is not kept as context for later turns
+            sys.stdout.write(f"\n\n{str(e)}\n")
+            self._print_response_footer(search_results)
+            return
+        sys.stdout.write("\n")
+        response = "".join(chunks)
+        self._print_response_footer(search_results)
         
         # Update conversation history
         self.memory_manager.add_exchange(self.session_id, query, response)
+    
+    async def compare_query(self, query):
+        """Send a research query to every available provider concurrently"""
+        if not query.strip():
+            return
         
-        # Display response
-        self._print_response(response, search_results)
+        query, context, search_results = await self._prepare_query(query)
+        
+        providers = self.ai_client.get_available_providers()
+        print(f"Querying {', '.join(providers)}...", end=" ", flush=True)
+        responses = await self.ai_client.aquery_many(providers, query, context)
+        print("Done!")
+        
+        for provider, response in responses.items():
+            self._print_response(response, title=f"RESPONSE ({provider})")
+        
+        if search_results:
+            self._print_search_results(search_results)
+            print(_SEP60)
     
-    def analyze_document(self, file_path, query="Analyze this document"):
+    async def analyze_document(self, file_path, query="Analyze this document"):
         """Analyze a document file"""
         if not os.path.exists(file_path):
             print(f"Error: File '{file_path}' not found.")
@@ -128,27 +224,19 @@ class TerminalResearchAssistant:
         # Extract text from document
         file_extension = self.document_processor.get_extension(file_path)
         print(f"Extracting text from {file_extension.upper()} file...", end=" ", flush=True)
-        text = self.document_processor.extract_text(file_path, file_extension)
+        text = self.document_processor.extract_trimmed_text(file_path, file_extension)
         print("Done!")
         
         # Get conversation context
         context = self.memory_manager.get_context(self.session_id)
         
-        # Prepare the query with document content
-        document_query = f"""
-        Analyze the following document content and answer the user's query.
-        
-        DOCUMENT CONTENT:
-        {text[:4000]}  # Limit to first 4000 characters
-        
-        USER QUERY: {query}
-        
-        Please provide a comprehensive analysis based on the document content.
-        """
+        # Prepare the query with document content; the context is embedded after
+        # the document rather than sent ahead of it as a system message
+        document_query = DOCUMENT_PROMPT.format(document=text, context=context or "None", query=query)
         
         # Get AI response
         print(f"Analyzing with {self.current_provider}...", end=" ", flush=True)
-        response = self.ai_client.query(self.current_provider, document_query, context)
+        response = await self.ai_client.aquery(self.current_provider, document_query)
         print("Done!")
         
         # Update conversation history
@@ -178,7 +266,7 @@ class TerminalResearchAssistant:
                         continue
                     
                     # Process research query
-                    self.process_query(user_input)
+                    self.run_async(self.process_query(user_input))
                     
                 except KeyboardInterrupt:
                     print("\nUse /quit to exit or press Ctrl+C again to force quit.")
@@ -193,57 +281,78 @@ class TerminalResearchAssistant:
     
     def _handle_command(self, command):
         """Handle terminal commands"""
-        parts = command.split()
-        cmd = parts[0].lower()
+        cmd, *args = command.split()
+        handler = self._commands.get(cmd.lower(), self._cmd_unknown)
+        handler(args)
+    
+    def _cmd_provider(self, args):
+        """Switch the active AI provider"""
+        if not args:
+            return self._cmd_unknown(args)
         
-        if cmd == '/provider' and len(parts) > 1:
-            new_provider = parts[1].lower()
-            available = self.ai_client.get_available_providers()
-            
-            if new_provider in available:
-                self.current_provider = new_provider
-                print(f"Switched to provider: {new_provider}")
-            else:
-                print(f"Provider '{new_provider}' not available. Available providers: {', '.join(available)}")
+        new_provider = args[0].lower()
+        available = self.ai_client.get_available_providers()
         
-        elif cmd == '/websearch':
-            if len(parts) > 1:
-                arg = parts[1].lower()
-                if arg in ['on', 'yes', 'true', '1']:
-                    if self.web_search.is_available():
-                        self.use_web_search = True
-                        print("Web search enabled.")
-                    else:
-                        print("Web search is not available. Check your API keys.")
-                elif arg in ['off', 'no', 'false', '0']:
-                    self.use_web_search = False
-                    print("Web search disabled.")
+        if new_provider in available:
+            self.current_provider = new_provider
+            print(f"Switched to provider: {new_provider}")
+        else:
+            print(f"Provider '{new_provider}' not available. Available providers: {', '.join(available)}")
+    
+    def _cmd_websearch(self, args):
+        """Enable, disable or toggle web search"""
+        if args:
+            arg = args[0].lower()
+            if arg in _TRUE:
+                if self.web_search.is_available():
+                    self.use_web_search = True
+                    print("Web search enabled.")
                 else:
-                    print("Usage: /websearch <on|off>")
+                    print("Web search is not available. Check your API keys.")
+            elif arg in _FALSE:
+                self.use_web_search = False
+                print("Web search disabled.")
             else:
-                # Toggle web search
-                self.use_web_search = not self.use_web_search
-                status = "enabled" if self.use_web_search else "disabled"
-                print(f"Web search {status}.")
-        
-        elif cmd == '/upload' and len(parts) > 1:
-            file_path = parts[1]
-            query = " ".join(parts[2:]) if len(parts) > 2 else "Analyze this document"
-            self.analyze_document(file_path, query)
-        
-        elif cmd in ['/clear', '/reset']:
-            self.memory_manager.clear_session(self.session_id)
-            print("Conversation history cleared.")
-        
-        elif cmd in ['/quit', '/exit', '/q']:
-            print("Goodbye!")
-            sys.exit(0)
+                print("Usage: /websearch <on|off>")
+        else:
+            # Toggle web search
+            self.use_web_search = not self.use_web_search
+            status = "enabled" if self.use_web_search else "disabled"
+            print(f"Web search {status}.")
+    
+    def _cmd_upload(self, args):
+        """Analyze a document, optionally with a custom query"""
+        if not args:
+            return self._cmd_unknown(args)
         
-        elif cmd == '/help':
-            self._print_welcome()
+        file_path = args[0]
+        query = " ".join(args[1:]) if len(args) > 1 else "Analyze this document"
+        self.run_async(self.analyze_document(file_path, query))
+    
+    def _cmd_compare(self, args):
+        """Ask every available provider the same question"""
+        if not args:
+            return self._cmd_unknown(args)
         
-        else:
-            print("Unknown command. Type /help for available commands.")
+        self.run_async(self.compare_query(" ".join(args)))
+    
+    def _cmd_clear(self, args):
+        """Clear the conversation history"""
+        self.memory_manager.clear_session(self.session_id)
+        print("Conversation history cleared.")
+    
+    def _cmd_quit(self, args):
+        """Exit the program"""
+        print("Goodbye!")
+        sys.exit(0)
+    
+    def _cmd_help(self, args):
+        """Show the welcome message and command list"""
+        self._print_welcome()
+    
+    def _cmd_unknown(self, args):
+        """Report an unrecognized or incomplete command"""
+        print("Unknown command. Type /help for available commands.")
 
 def main():
     """Main function to run the terminal research assistant"""
@@ -267,18 +376,21 @@ def main():
         use_web_search=args.web_search
     )
     
-    # Non-interactive mode for single query
-    if args.query:
-        assistant.process_query(args.query)
-        return
-    
-    # Non-interactive mode for document analysis
-    if args.file:
-        assistant.analyze_document(args.file, args.document_query)
-        return
-    
-    # Interactive mode
-    assistant.run()
+    try:
+        # Non-interactive mode for single query
+        if args.query:
+            assistant.run_async(assistant.process_query(args.query))
+            return
+        
+        # Non-interactive mode for document analysis
+        if args.file:
+            assistant.run_async(assistant.analyze_document(args.file, args.document_query))
+            return
+        
+        # Interactive mode
+        assistant.run()
+    finally:
+        assistant.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,21 +1,60 @@
 import os
 import uuid
+import shutil
 import tempfile
-from flask import Flask, render_template, request, jsonify
+import jinja2
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Request, render_template, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_socketio import SocketIO, emit
+from markupsafe import escape
 from dotenv import load_dotenv
 
 from ai_client import AIClient
 from web_search import WebSearchClient
 from memory_manager import MemoryManager
-from document_processor import DocumentProcessor
+from document_processor import DEFAULT_MAX_TOKENS, DocumentParserPool, DocumentProcessor
 
 # Load environment variables
 load_dotenv()
 
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+class UploadRequest(Request):
+    """Request that spools uploads so the parser can read them without another copy"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Parsing runs in another process, so an in-memory upload would be
+        # pickled through a pipe: a full copy out and a full copy back in.
+        # Spooling to a named file costs one (usually page-cached) write, and
+        # the parser only needs the path. Werkzeug's default would also spool
+        # anything over 500 KB, but to an anonymous file it cannot hand over.
+        # The file is deleted when the request closes its files.
+        return tempfile.NamedTemporaryFile("wb+")
+
 # Initialize Flask app
 app = Flask(__name__)
+app.request_class = UploadRequest
+app.json = OrjsonProvider(app)
 app.secret_key = os.urandom(24)
+# Reject oversized uploads before they are read
+app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
+
+# Outside debug mode, keep compiled templates: no per-render reload check and
+# bytecode persisted across restarts. Debug runs still turn auto-reload back on.
+if not app.debug:
+    app.jinja_env.auto_reload = False
+    jinja_cache_dir = os.path.join(app.root_path, '.jinja_cache')
+    os.makedirs(jinja_cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = jinja2.FileSystemBytecodeCache(directory=jinja_cache_dir)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 # Initialize components
@@ -24,19 +63,34 @@ web_search = WebSearchClient()
 memory_manager = MemoryManager()
 document_processor = DocumentProcessor()
 
+# Provider availability is fixed at startup, so resolve the default once
+_AVAILABLE = ai_client.get_available_providers()
+_DEFAULT_PROVIDER = _AVAILABLE[0] if _AVAILABLE else 'deepseek'
+
+# Worker threads for network calls that can overlap within one request
+executor = ThreadPoolExecutor(max_workers=8)
+
+# Worker processes for document parsing, so GIL-bound PDF/docx work cannot
+# stall the server while other clients are being served
+DOCUMENT_PARSE_TIMEOUT = 60
+document_parser = DocumentParserPool(timeout=DOCUMENT_PARSE_TIMEOUT)
+
+# Compile the page template once at import instead of on the first request
+app.jinja_env.get_template('index.html')
+
 @app.route('/')
 def index():
     return render_template('index.html', 
-                         providers=ai_client.get_available_providers(),
+                         providers=_AVAILABLE,
                          web_search_enabled=web_search.is_available())
 
 @app.route('/api/research', methods=['POST'])
 def api_research():
     data = request.json
     query = data.get('query', '')
-    provider = data.get('provider', ai_client.get_available_providers()[0] if ai_client.get_available_providers() else 'deepseek')
+    provider = data.get('provider') or _DEFAULT_PROVIDER
     use_web_search = data.get('web_search', False)
-    session_id = data.get('session_id', str(uuid.uuid4()))
+    session_id = data.get('session_id') or uuid.uuid4().hex
     
     # Get conversation context
     context = memory_manager.get_context(session_id)
@@ -69,23 +123,62 @@ def api_analyze_document():
     
     file = request.files['file']
     query = request.form.get('query', 'Analyze this document')
-    provider = request.form.get('provider', ai_client.get_available_providers()[0] if ai_client.get_available_providers() else 'deepseek')
-    session_id = request.form.get('session_id', str(uuid.uuid4()))
+    provider = request.form.get('provider') or _DEFAULT_PROVIDER
+    session_id = request.form.get('session_id') or uuid.uuid4().hex
     
     # Check if file is supported
     if not document_processor.is_supported(file.filename):
         return jsonify({'error': 'Unsupported file type'}), 400
     
-    # Save uploaded file temporarily
     file_extension = document_processor.get_extension(file.filename)
     
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_extension}') as temp_file:
-        file.save(temp_file.name)
-        text = document_processor.extract_text(temp_file.name, file_extension)
+    # UploadRequest already spooled the upload to a named temp file, so the
+    # parser reads it in place
+    file.stream.flush()
+    text = _extract_document_text(file.stream.name, file_extension)
+    
+    if text is None:
+        return jsonify({'error': 'Document parsing timed out'}), 504
+    
+    return jsonify(_analyze_document_text(text, query, provider, session_id))
+
+@app.route('/api/analyze_document_stream', methods=['PUT'])
+def api_analyze_document_stream():
+    """Analyze a document sent as the raw request body, skipping multipart parsing"""
+    filename = request.args.get('filename') or request.headers.get('X-Filename', '')
+    query = request.args.get('query', 'Analyze this document')
+    provider = request.args.get('provider') or _DEFAULT_PROVIDER
+    session_id = request.args.get('session_id') or uuid.uuid4().hex
+    
+    # Check if file is supported
+    if not document_processor.is_supported(filename):
+        return jsonify({'error': 'Unsupported file type'}), 400
+    
+    # Copy the body straight to disk in 64 KiB chunks
+    file_extension = document_processor.get_extension(filename)
+    
+    # An oversized body (413) or a client disconnect fails mid-copy, so the
+    # temp file is cleaned up on every path
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_extension}')
+    try:
+        with temp_file:
+            shutil.copyfileobj(request.stream, temp_file, length=65536)
+        text = _extract_document_text(temp_file.name, file_extension)
+    finally:
+        # Clean up temporary file
+        os.unlink(temp_file.name)
     
-    # Clean up temporary file
-    os.unlink(temp_file.name)
+    if text is None:
+        return jsonify({'error': 'Document parsing timed out'}), 504
     
+    return jsonify(_analyze_document_text(text, query, provider, session_id))
+
+def _extract_document_text(source, file_extension):
+    """Parse a document in a worker process, returning None if it takes too long"""
+    return document_parser.extract_text(source, file_extension, DEFAULT_MAX_TOKENS)
+
+def _analyze_document_text(text, query, provider, session_id):
+    """Ask the AI provider about extracted document text and record the exchange"""
     # Get conversation context
     context = memory_manager.get_context(session_id)
     
@@ -94,7 +187,7 @@ def api_analyze_document():
     Analyze the following document content and answer the user's query.
     
     DOCUMENT CONTENT:
-    {text[:4000]}  # Limit to first 4000 characters
+    {text}
     
     USER QUERY: {query}
     
@@ -107,347 +200,67 @@ def api_analyze_document():
     # Update conversation history
     memory_manager.add_exchange(session_id, f"Document analysis query: {query}", response)
     
-    return jsonify({
+    return {
         'response': response,
         'session_id': session_id
-    })
+    }
 
 @socketio.on('research_request')
 def handle_research_request(data):
+    emit('research_status', {'status': 'searching'})
+    
+    # Do the research in a background task so this worker can serve other clients
+    socketio.start_background_task(_run_research_request, data, request.sid)
+
+def _run_research_request(data, sid):
+    """Answer a SocketIO research request and emit the result to its client"""
     query = data.get('query', '')
-    provider = data.get('provider', ai_client.get_available_providers()[0] if ai_client.get_available_providers() else 'deepseek')
+    provider = data.get('provider') or _DEFAULT_PROVIDER
     use_web_search = data.get('web_search', False)
-    session_id = data.get('session_id', str(uuid.uuid4()))
+    session_id = data.get('session_id') or uuid.uuid4().hex
     
-    emit('research_status', {'status': 'searching'})
+    # Start the web search first so it overlaps with the context lookup
+    search_future = None
+    if use_web_search and web_search.is_available():
+        search_future = executor.submit(web_search.search, query)
     
     # Get conversation context
     context = memory_manager.get_context(session_id)
     
-    # Perform web search if enabled and requested
     search_results = []
-    if use_web_search and web_search.is_available():
-        search_results = web_search.search(query)
+    if search_future is not None:
+        search_results = search_future.result()
         if search_results:
             # Add search results to the query
             search_context = "\n".join([f"Source: {r['title']}\nContent: {r['snippet']}" for r in search_results])
             query = f"{query}\n\nHere are some web search results for context:\n{search_context}"
     
-    # Get AI response
-    response = ai_client.query(provider, query, context)
+    # Stream the AI response to the client as it is generated
+    chunks = []
+    try:
+        for chunk in ai_client.stream(provider, query, context):
+            chunks.append(chunk)
+            socketio.emit('research_chunk', {'delta': chunk, 'session_id': session_id}, to=sid)
+    except RuntimeError as e:
+        # Report the failure on its own and keep the partial answer out of the history
+        socketio.emit('research_error', {'error': str(e), 'session_id': session_id}, to=sid)
+        return
+    response = "".join(chunks)
     
-    # Update conversation history
+    # Update conversation history once the full response is known
     memory_manager.add_exchange(session_id, query, response)
     
-    # Beautify the response for better readability
-    if isinstance(response, str):
-        beautified_response = response.strip()
-        beautified_response = beautified_response.replace('\n\n', '<br><br>').replace('\n', '<br>')
-    else:
-        beautified_response = str(response)
+    # Beautify the response for better readability: escape model output so it
+    # cannot inject markup, then turn newlines into breaks in a single pass
+    # (str() first, since Markup.replace would escape the '<br>' too)
+    beautified_response = str(escape(str(response).strip())).replace('\n', '<br>')
 
-    emit('research_complete', {
+    socketio.emit('research_complete', {
         'response': beautified_response,
         'search_results': search_results,
         'session_id': session_id
-    })
+    }, to=sid)
 
 if __name__ == "__main__":
-    # Create templates and static directories if they don't exist
-    os.makedirs('templates', exist_ok=True)
-    os.makedirs('static', exist_ok=True)
-    
-    # Create basic HTML template
-    with open('templates/index.html', 'w') as f:
-        f.write('''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Advanced Research Assistant</title>
-    <script src="https://cdn.socket.io/4.5.0/socket.io.min.js"></script>
-    <link rel="stylesheet" href="{{ url_for('static', filename='style.css') }}">
-</head>
-<body>
-    <div class="container">
-        <h1>Advanced Research Assistant</h1>
-        
-        <div class="controls">
-            <label for="provider">AI Provider:</label>
-            <select id="provider">
-                {% for provider in providers %}
-                <option value="{{ provider }}">{{ provider }}</option>
-                {% endfor %}
-            </select>
-            
-            {% if web_search_enabled %}
-            <label for="web-search">Web Search:</label>
-            <input type="checkbox" id="web-search">
-            {% endif %}
-        </div>
-        
-        <div class="chat-container" id="chat-container"></div>
-        
-        <div class="input-container">
-            <textarea id="query-input" placeholder="Enter your research question..." rows="3"></textarea>
-            <button onclick="sendQuery()">Send</button>
-        </div>
-        
-        <div class="file-upload">
-            <h3>Analyze Document</h3>
-            <input type="file" id="file-input" accept=".txt,.pdf,.docx">
-            <textarea id="document-query" placeholder="What would you like to know about this document?" rows="2"></textarea>
-            <button onclick="analyzeDocument()">Analyze Document</button>
-        </div>
-    </div>
-    
-    <script>
-        const socket = io();
-        let sessionId = Date.now().toString();
-        
-        socket.on('research_status', function(data) {
-            addMessage('Assistant', 'Searching for information...', 'status');
-        });
-        
-        socket.on('research_complete', function(data) {
-            // Remove status message
-            const statusMessages = document.querySelectorAll('.status-message');
-            statusMessages.forEach(msg => msg.remove());
-            
-            addMessage('Assistant', data.response);
-            
-            // Display search results if any
-            if (data.search_results && data.search_results.length > 0) {
-                let resultsHtml = '<h4>Search Results:</h4>';
-                data.search_results.forEach(result => {
-                    resultsHtml += `
-                        <div class="search-result">
-                            <a href="${result.link}" target="_blank">${result.title}</a>
-                            <p>${result.snippet}</p>
-                            <small>Source: ${result.source}</small>
-                        </div>
-                    `;
-                });
-                addMessage('Assistant', resultsHtml, 'search-results');
-            }
-            
-            sessionId = data.session_id;
-        });
-        
-        function addMessage(sender, message, className = '') {
-            const chatContainer = document.getElementById('chat-container');
-            const messageDiv = document.createElement('div');
-            messageDiv.className = `message ${sender.toLowerCase()}-message ${className}`;
-            messageDiv.innerHTML = `<strong>${sender}:</strong><br>${message}`;
-            chatContainer.appendChild(messageDiv);
-            chatContainer.scrollTop = chatContainer.scrollHeight;
-        }
-        
-        function sendQuery() {
-            const query = document.getElementById('query-input').value;
-            const provider = document.getElementById('provider').value;
-            const webSearch = document.getElementById('web-search') ? document.getElementById('web-search').checked : false;
-            
-            if (!query) return;
-            
-            addMessage('You', query, 'user-message');
-            document.getElementById('query-input').value = '';
-            
-            // Send via WebSocket for real-time updates
-            socket.emit('research_request', {
-                query: query,
-                provider: provider,
-                web_search: webSearch,
-                session_id: sessionId
-            });
-        }
-        
-        function analyzeDocument() {
-            const fileInput = document.getElementById('file-input');
-            const query = document.getElementById('document-query').value || 'Analyze this document';
-            const provider = document.getElementById('provider').value;
-            
-            if (!fileInput.files.length) {
-                alert('Please select a file first');
-                return;
-            }
-            
-            const formData = new FormData();
-            formData.append('file', fileInput.files[0]);
-            formData.append('query', query);
-            formData.append('provider', provider);
-            formData.append('session_id', sessionId);
-            
-            addMessage('You', `Document analysis: ${query}`, 'user-message');
-            
-            fetch('/api/analyze_document', {
-                method: 'POST',
-                body: formData
-            })
-            .then(response => response.json())
-            .then(data => {
-                addMessage('Assistant', data.response);
-                sessionId = data.session_id;
-            })
-            .catch(error => {
-                addMessage('Assistant', 'Error analyzing document: ' + error);
-            });
-        }
-        
-        // Allow pressing Enter to send message
-        document.getElementById('query-input').addEventListener('keypress', function(e) {
-            if (e.key === 'Enter' && !e.shiftKey) {
-                e.preventDefault();
-                sendQuery();
-            }
-        });
-    </script>
-</body>
-</html>
-        ''')
-    
-    # Create CSS file
-    with open('static/style.css', 'w') as f:
-        f.write('''
-body {
-    font-family: Arial, sans-serif;
-    max-width: 800px;
-    margin: 0 auto;
-    padding: 20px;
-    background-color: #f5f5f5;
-}
-
-.container {
-    background-color: white;
-    padding: 20px;
-    border-radius: 8px;
-    box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-}
-
-h1 {
-    color: #333;
-    text-align: center;
-}
-
-.controls {
-    margin-bottom: 15px;
-    padding: 10px;
-    background-color: #f9f9f9;
-    border-radius: 5px;
-}
-
-.controls label {
-    margin-right: 10px;
-    font-weight: bold;
-}
-
-.controls select, .controls input {
-    margin-right: 15px;
-}
-
-.chat-container {
-    border: 1px solid #ddd;
-    border-radius: 5px;
-    padding: 15px;
-    height: 400px;
-    overflow-y: auto;
-    margin-bottom: 15px;
-    background-color: #fafafa;
-}
-
-.message {
-    margin-bottom: 15px;
-    padding: 10px;
-    border-radius: 5px;
-}
-
-.user-message {
-    background-color: #e6f7ff;
-    text-align: right;
-}
-
-.assistant-message {
-    background-color: #f0f0f0;
-}
-
-.status-message {
-    background-color: #fff3cd;
-    font-style: italic;
-}
-
-.search-result {
-    border-left: 3px solid #4CAF50;
-    padding-left: 10px;
-    margin-bottom: 10px;
-    background-color: #f8fff8;
-}
-
-.search-result a {
-    color: #1a73e8;
-    text-decoration: none;
-    font-weight: bold;
-}
-
-.search-result a:hover {
-    text-decoration: underline;
-}
-
-.search-result small {
-    color: #666;
-}
-
-.input-container {
-    display: flex;
-    margin-bottom: 15px;
-}
-
-#query-input {
-    flex: 1;
-    padding: 10px;
-    border: 1px solid #ddd;
-    border-radius: 4px;
-    resize: vertical;
-}
-
-button {
-    padding: 10px 15px;
-    margin-left: 10px;
-    background-color: #4CAF50;
-    color: white;
-    border: none;
-    border-radius: 4px;
-    cursor: pointer;
-}
-
-button:hover {
-    background-color: #45a049;
-}
-
-.file-upload {
-    padding: 15px;
-    background-color: #f9f9f9;
-    border-radius: 5px;
-    margin-top: 15px;
-}
-
-.file-upload h3 {
-    margin-top: 0;
-}
-
-#file-input {
-    margin-bottom: 10px;
-}
-
-#document-query {
-    width: 100%;
-    padding: 10px;
-    border: 1px solid #ddd;
-    border-radius: 4px;
-    resize: vertical;
-    margin-bottom: 10px;
-}
-        ''')
-    
     # Run the Flask app
     socketio.run(app, debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -1,44 +1,244 @@
 import os
+import zipfile
 import tempfile
-import docx
+import threading
+import multiprocessing
 import PyPDF2
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from lxml import etree
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple, Union
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# Default prompt budget for document content, in tokens
+DEFAULT_MAX_TOKENS = 3500
+
+# WordprocessingML elements that carry paragraph text
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P, _W_T, _W_TAB, _W_BR, _W_CR = _W + "p", _W + "t", _W + "tab", _W + "br", _W + "cr"
+# Alternate content (e.g. textboxes) repeats itself in mc:Fallback for older readers
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
 
 class DocumentProcessor:
     def __init__(self):
         """Initialize document processor"""
-        self.supported_extensions = ['txt', 'pdf', 'docx']
+        self.supported_extensions = frozenset(('txt', 'pdf', 'docx'))
+        self._encoding = None
+        # file_path -> (mtime, max_tokens, trimmed text)
+        self._doc_cache: Dict[str, Tuple[float, int, str]] = {}
     
-    def extract_text(self, file_path: str, file_extension: str) -> str:
+    def extract_text(self, source: Union[str, BinaryIO], file_extension: str) -> str:
         """
         Extract text from a document file
         
         Args:
-            file_path: Path to the file
+            source: Path to the file, or a seekable binary file object
             file_extension: File extension (txt, pdf, docx)
             
         Returns:
             Extracted text content
         """
         try:
-            if file_extension == "pdf":
-                with open(file_path, "rb") as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    text = ""
-                    for page in pdf_reader.pages:
-                        text += page.extract_text()
-                    return text
-            elif file_extension == "docx":
-                doc = docx.Document(file_path)
-                return "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            elif file_extension == "txt":
-                with open(file_path, "r", encoding="utf-8") as file:
-                    return file.read()
+            return "".join(self._iter_text(source, file_extension))
+        except Exception as e:
+            return f"Error extracting text: {str(e)}"
+    
+    def _iter_pdf_pages(self, source: Union[str, BinaryIO]) -> Iterator[str]:
+        """Yield PDF page text with PDFium when installed, falling back to PyPDF2"""
+        pdf = None
+        if pdfium is not None:
+            try:
+                pdf = pdfium.PdfDocument(source)
+            except Exception:
+                pdf = None
+        
+        if pdf is not None:
+            # PDFium is not thread-safe, so pages are read sequentially
+            try:
+                for index in range(len(pdf)):
+                    page = pdf[index]
+                    textpage = page.get_textpage()
+                    yield textpage.get_text_range()
+                    textpage.close()
+                    page.close()
+            finally:
+                pdf.close()
+            return
+        
+        if isinstance(source, str):
+            with open(source, "rb") as file:
+                yield from self._iter_pypdf2_pages(file)
+        else:
+            source.seek(0)
+            yield from self._iter_pypdf2_pages(source)
+    
+    def _iter_pypdf2_pages(self, file: BinaryIO) -> Iterator[str]:
+        """Yield PDF page text with PyPDF2"""
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page in pdf_reader.pages:
+            # extract_text() can return None for pages without a text layer
+            yield page.extract_text() or ""
+    
+    def _iter_docx_paragraphs(self, source: Union[str, BinaryIO]) -> Iterator[str]:
+        """Stream non-empty paragraph text straight from word/document.xml"""
+        with zipfile.ZipFile(source) as archive, archive.open("word/document.xml") as xml:
+            # Runs of each open paragraph; a textbox nests its paragraphs inside
+            # the host paragraph, so each level collects its own text
+            paragraphs = []
+            fallback_depth = 0
+            first = True
+            # iterparse reads the XML incrementally instead of building python-docx's tree
+            for event, element in etree.iterparse(xml, events=("start", "end"),
+                                                  tag=(_W_P, _W_T, _W_TAB, _W_BR, _W_CR, _MC_FALLBACK)):
+                tag = element.tag
+                if tag == _MC_FALLBACK:
+                    if event == "start":
+                        fallback_depth += 1
+                    else:
+                        fallback_depth -= 1
+                        element.clear()
+                    continue
+                if fallback_depth:
+                    continue
+                
+                if tag == _W_P:
+                    if event == "start":
+                        paragraphs.append([])
+                        continue
+                    text = "".join(paragraphs.pop())
+                    if not paragraphs:
+                        # Free the paragraph and everything parsed before it
+                        # (earlier paragraphs, finished tables) so the tree
+                        # stays small however long the document is
+                        element.clear()
+                        while element.getprevious() is not None:
+                            del element.getparent()[0]
+                    if text:
+                        yield text if first else f"\n{text}"
+                        first = False
+                elif event == "end" and paragraphs:
+                    runs = paragraphs[-1]
+                    if tag == _W_T:
+                        if element.text:
+                            runs.append(element.text)
+                    elif tag == _W_TAB:
+                        runs.append("\t")
+                    else:
+                        runs.append("\n")
+    
+    def _iter_text(self, source: Union[str, BinaryIO], file_extension: str) -> Iterator[str]:
+        """Yield a document's text piece by piece (pages, paragraphs or blocks)"""
+        if file_extension == "pdf":
+            yield from self._iter_pdf_pages(source)
+        elif file_extension == "docx":
+            yield from self._iter_docx_paragraphs(source)
+        elif file_extension == "txt":
+            if isinstance(source, str):
+                with open(source, "r", encoding="utf-8") as file:
+                    yield from iter(lambda: file.read(65536), "")
             else:
-                return "Unsupported file type"
+                yield source.read().decode("utf-8", errors="replace")
+        else:
+            yield "Unsupported file type"
+    
+    def extract_text_capped(self, source: Union[str, BinaryIO], file_extension: str,
+                            max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        """
+        Extract text from a document, stopping once a token budget is filled
+        
+        Args:
+            source: Path to the file, or a seekable binary file object
+            file_extension: File extension (txt, pdf, docx)
+            max_tokens: Maximum number of tokens to keep
+            
+        Returns:
+            Extracted text content trimmed to the budget
+        """
+        try:
+            parts = []
+            used = 0
+            pieces = self._iter_text(source, file_extension)
+            try:
+                for piece in pieces:
+                    parts.append(piece)
+                    used += self.count_tokens(piece)
+                    # Later pages would be cut anyway, so stop parsing here
+                    if used >= max_tokens:
+                        break
+            finally:
+                pieces.close()
+            return self.truncate_tokens("".join(parts), max_tokens)
         except Exception as e:
             return f"Error extracting text: {str(e)}"
     
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens in a piece of text"""
+        if tiktoken is None:
+            return len(text) // 4
+        return len(self._get_encoding().encode(text, disallowed_special=()))
+    
+    def _get_encoding(self):
+        """Load the tokenizer on first use"""
+        if self._encoding is None:
+            self._encoding = tiktoken.get_encoding("cl100k_base")
+        return self._encoding
+    
+    def truncate_tokens(self, text: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        """
+        Trim text to a token budget
+        
+        Args:
+            text: The text to trim
+            max_tokens: Maximum number of tokens to keep
+            
+        Returns:
+            The leading part of the text that fits in the budget
+        """
+        if tiktoken is None:
+            # Roughly four characters per token for English text
+            return text[:max_tokens * 4]
+        
+        # Tokens rarely span more than ten characters, so there is no need to
+        # encode the rest of a long document
+        encoding = self._get_encoding()
+        tokens = encoding.encode(text[:max_tokens * 10], disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text[:max_tokens * 10]
+        return encoding.decode(tokens[:max_tokens])
+    
+    def extract_trimmed_text(self, file_path: str, file_extension: str,
+                             max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        """
+        Extract text from a document and trim it to a token budget, reusing
+        the result for follow-up queries on an unchanged file
+        
+        Args:
+            file_path: Path to the file
+            file_extension: File extension (txt, pdf, docx)
+            max_tokens: Maximum number of tokens to keep
+            
+        Returns:
+            Extracted text content trimmed to the budget
+        """
+        mtime = os.path.getmtime(file_path)
+        cached = self._doc_cache.get(file_path)
+        if cached and cached[0] == mtime and cached[1] == max_tokens:
+            return cached[2]
+        
+        text = self.extract_text_capped(file_path, file_extension, max_tokens)
+        if not text.startswith("Error extracting text"):
+            self._doc_cache[file_path] = (mtime, max_tokens, text)
+        return text
+    
     def is_supported(self, filename: str) -> bool:
         """
         Check if a file is supported based on its extension
@@ -49,8 +249,7 @@ class DocumentProcessor:
         Returns:
             True if the file type is supported, False otherwise
         """
-        file_extension = filename.split('.')[-1].lower()
-        return file_extension in self.supported_extensions
+        return self.get_extension(filename) in self.supported_extensions
     
     def get_extension(self, filename: str) -> str:
         """
@@ -60,6 +259,93 @@ class DocumentProcessor:
             filename: The name of the file
             
         Returns:
-            The file extension
+            The file extension, or an empty string if there is none
+        """
+        return os.path.splitext(filename)[1][1:].lower()
+
+class DocumentParserPool:
+    def __init__(self, max_workers: Optional[int] = None, timeout: float = 60):
+        """
+        Parse documents in worker processes so GIL-bound PDF/docx work cannot
+        stall the server, killing the workers when a parse runs away or crashes
+        
+        Args:
+            max_workers: Maximum number of documents parsed at once
+            timeout: Seconds a parse may run before its pool is killed
+        """
+        self.max_workers = max_workers or max(2, (os.cpu_count() or 2) // 2)
+        self.timeout = timeout
+        # At most one parse per worker, so a job never waits in the pool's
+        # queue and the timeout only measures parsing
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._executor = None
+        
+        # Workers fork from a server that has only imported this module rather
+        # than from the threaded web server. Each worker still runs the parent's
+        # main script once as __mp_main__ when it starts (the whole app, under
+        # `python app.py`), so workers are kept for the pool's lifetime instead
+        # of being started per document.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context("forkserver")
+            self._context.set_forkserver_preload([__name__])
+        else:
+            self._context = multiprocessing.get_context("spawn")
+    
+    def extract_text(self, source: Union[str, BinaryIO], file_extension: str,
+                     max_tokens: int = DEFAULT_MAX_TOKENS) -> Optional[str]:
+        """
+        Extract text from a document in a worker process
+        
+        Args:
+            source: Path to the file, or a picklable binary file object
+            file_extension: File extension (txt, pdf, docx)
+            max_tokens: Maximum number of tokens to keep
+            
+        Returns:
+            Extracted text content trimmed to the budget, or None if parsing
+            did not finish within the timeout
         """
-        return filename.split('.')[-1].lower()
\ No newline at end of file
+        with self._slots:
+            # Retry once: the pool may have been killed under this parse because
+            # another document timed out or crashed a worker
+            for _ in range(2):
+                executor = self._get_executor()
+                try:
+                    future = executor.submit(_parse_document, source, file_extension, max_tokens)
+                    return future.result(timeout=self.timeout)
+                except TimeoutError:
+                    # cancel() cannot stop a running parse, so the workers go instead
+                    self._discard(executor)
+                    return None
+                except BrokenProcessPool:
+                    self._discard(executor)
+            return "Error extracting text: document parser crashed"
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Return the current pool, starting a new one if the last was discarded"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context)
+            return self._executor
+    
+    def _discard(self, executor: ProcessPoolExecutor):
+        """Kill a pool's workers so the next parse starts a fresh pool"""
+        with self._lock:
+            if self._executor is not executor:
+                # Another thread already replaced it
+                return
+            self._executor = None
+        
+        # ProcessPoolExecutor has no public way to stop a running task before 3.14
+        kill_workers = getattr(executor, "kill_workers", None)
+        if kill_workers is not None:
+            kill_workers()
+        else:
+            for process in list((executor._processes or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _parse_document(source: Union[str, BinaryIO], file_extension: str, max_tokens: int) -> str:
+    """Worker process entry point: parse one document"""
+    return DocumentProcessor().extract_text_capped(source, file_extension, max_tokens)
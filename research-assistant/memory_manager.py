@@ -1,4 +1,6 @@
-from typing import Dict, List, Tuple
+import threading
+from collections import deque
+from typing import Dict
 
 class MemoryManager:
     def __init__(self, max_history_per_session: int = 10):
@@ -10,6 +12,11 @@ class MemoryManager:
         """
         self.conversation_history = {}
         self.max_history = max_history_per_session
+        # Assembled context string per session, kept in step with the history
+        self._context_cache: Dict[str, str] = {}
+        # Handlers run on several threads; the history and its cached context
+        # must change together or the cache can go stale for good
+        self._lock = threading.Lock()
     
     def get_context(self, session_id: str) -> str:
         """
@@ -21,12 +28,21 @@ class MemoryManager:
         Returns:
             Context string from previous conversation
         """
-        if session_id not in self.conversation_history:
-            return ""
-        
-        # Get last few exchanges for context
-        context_exchanges = self.conversation_history[session_id][-self.max_history:]
-        return "\n".join([f"Q: {q}\nA: {a}" for q, a in context_exchanges])
+        with self._lock:
+            history = self.conversation_history.get(session_id)
+            if history is None:
+                return ""
+            
+            cached = self._context_cache.get(session_id)
+            if cached is not None:
+                return cached
+            
+            # The deque only ever holds the last max_history exchanges. Snapshot it
+            # with tuple() (a single C-level copy) before joining.
+            exchanges = tuple(history)
+            context = "\n".join(f"Q: {q}\nA: {a}" for q, a in exchanges)
+            self._context_cache[session_id] = context
+            return context
     
     def add_exchange(self, session_id: str, query: str, response: str):
         """
@@ -37,16 +53,26 @@ class MemoryManager:
             query: The user's query
             response: The AI's response
         """
-        if session_id not in self.conversation_history:
-            self.conversation_history[session_id] = []
-        
-        self.conversation_history[session_id].append((query, response))
-        
-        # Trim history if it exceeds the maximum
-        if len(self.conversation_history[session_id]) > self.max_history:
-            self.conversation_history[session_id] = self.conversation_history[session_id][-self.max_history:]
+        with self._lock:
+            if session_id not in self.conversation_history:
+                # A bounded deque drops the oldest exchange automatically
+                self.conversation_history[session_id] = deque(maxlen=self.max_history)
+            
+            history = self.conversation_history[session_id]
+            evicting = len(history) == self.max_history
+            history.append((query, response))
+            
+            # Extend the cached context in place unless the oldest exchange just
+            # fell off, in which case it is rebuilt on the next read
+            cached = self._context_cache.get(session_id)
+            if cached is None or evicting:
+                self._context_cache.pop(session_id, None)
+            else:
+                entry = f"Q: {query}\nA: {response}"
+                self._context_cache[session_id] = f"{cached}\n{entry}" if cached else entry
     
     def clear_session(self, session_id: str):
         """Clear conversation history for a specific session"""
-        if session_id in self.conversation_history:
-            del self.conversation_history[session_id]
\ No newline at end of file
+        with self._lock:
+            self.conversation_history.pop(session_id, None)
+            self._context_cache.pop(session_id, None)
\ No newline at end of file
@@ -0,0 +1,129 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+try:
+    import numpy as np
+    import torch
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    np = None
+    torch = None
+    SentenceTransformer = None
+
+class SemanticCache:
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", threshold: float = 0.92,
+                 max_entries_per_bucket: int = 256, max_total_entries: int = 4096):
+        """
+        Initialize a cache that matches rephrased queries by embedding similarity
+
+        Args:
+            model_name: Sentence-transformers model used to embed queries
+            threshold: Minimum cosine similarity for a cache hit
+            max_entries_per_bucket: Maximum responses kept per (provider, context)
+            max_total_entries: Maximum responses kept across all buckets
+        """
+        if SentenceTransformer is None:
+            raise RuntimeError("sentence-transformers, torch and numpy are required for the semantic cache")
+
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_entries = max_entries_per_bucket
+        self.max_total_entries = max_total_entries
+        self._embedder = None
+        self._embedder_lock = threading.Lock()
+        # (provider, context hash) -> (normalized vectors, responses), least recently
+        # used first; context changes every turn, so stale buckets are evicted whole
+        self._buckets: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, list]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def embed(self, query: str) -> Optional["np.ndarray"]:
+        """
+        Return the normalized embedding of a query
+
+        Returns:
+            The embedding, or None if the query does not fit the model's input
+            window. A truncated embedding only sees the start of the prompt (the
+            document, in an analysis prompt), so unrelated questions would match.
+        """
+        embedder = self._get_embedder()
+        max_length = embedder.max_seq_length
+
+        # Tokenize once, one token past the window so overlong queries are
+        # detectable, and feed the result straight to the model instead of
+        # letting encode() tokenize the query a second time
+        features = embedder.tokenizer(
+            [query], truncation=True, max_length=max_length + 1,
+            padding=True, return_tensors="pt"
+        )
+        if features["input_ids"].shape[1] > max_length:
+            return None
+
+        features = {name: tensor.to(embedder.device) for name, tensor in features.items()}
+        with torch.inference_mode():
+            embedding = embedder(features)["sentence_embedding"]
+        embedding = torch.nn.functional.normalize(embedding, p=2, dim=1)
+        return embedding[0].cpu().numpy().astype(np.float32)
+
+    def _get_embedder(self) -> "SentenceTransformer":
+        """Load the embedding model on first use, once even under concurrent callers"""
+        if self._embedder is None:
+            with self._embedder_lock:
+                if self._embedder is None:
+                    self._embedder = SentenceTransformer(self.model_name)
+        return self._embedder
+
+    def get(self, provider: str, context: str, vector: "np.ndarray") -> Optional[str]:
+        """
+        Look up a response for a semantically similar query
+
+        Args:
+            provider: The AI provider the response must come from
+            context: Conversation context the response was generated with
+            vector: Embedding of the new query
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        key = self._bucket_key(provider, context)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return None
+
+            self._buckets.move_to_end(key)
+            vectors, responses = bucket
+            # Vectors are normalized, so one matmul gives every cosine similarity
+            sims = vectors @ vector
+            best = int(sims.argmax())
+            if sims[best] > self.threshold:
+                return responses[best]
+            return None
+
+    def put(self, provider: str, context: str, vector: "np.ndarray", response: str):
+        """Store a response under the embedding of the query that produced it"""
+        key = self._bucket_key(provider, context)
+        with self._lock:
+            vectors, responses = self._buckets.pop(key, (np.zeros((0, vector.shape[0]), dtype=np.float32), []))
+            self._size -= len(responses)
+            vectors = np.vstack([vectors, vector])
+            responses = responses + [response]
+
+            # Drop the oldest entries once the bucket is full
+            if len(responses) > self.max_entries:
+                vectors = vectors[-self.max_entries:]
+                responses = responses[-self.max_entries:]
+
+            self._buckets[key] = (vectors, responses)
+            self._size += len(responses)
+
+            # Evict least recently used buckets once the whole cache is full
+            while self._size > self.max_total_entries and len(self._buckets) > 1:
+                _, (_, evicted) = self._buckets.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _bucket_key(self, provider: str, context: str) -> Tuple[str, str]:
+        """Group entries so only queries asked in the same conversation state match"""
+        return provider, hashlib.blake2b(context.encode(), digest_size=16).hexdigest()
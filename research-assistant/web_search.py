@@ -1,14 +1,50 @@
 import os
+import json
+import asyncio
+import hashlib
 import requests
 import serpapi
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait
 from googleapiclient.discovery import build
 from typing import Dict, List, Optional
 
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Shared pool for querying several search backends at once
+_EXECUTOR = ThreadPoolExecutor(max_workers=8)
+
 class WebSearchClient:
     def __init__(self):
         """Initialize web search clients with API keys from environment"""
-        self.serpapi_enabled = bool(os.getenv("SERPAPI_API_KEY"))
-        self.google_pse_enabled = bool(os.getenv("GOOGLE_PSE_ID") and os.getenv("GOOGLE_API_KEY"))
+        self._serpapi_key = os.getenv("SERPAPI_API_KEY")
+        self._google_key = os.getenv("GOOGLE_API_KEY")
+        self._google_cx = os.getenv("GOOGLE_PSE_ID")
+        
+        self.serpapi_enabled = bool(self._serpapi_key)
+        self.google_pse_enabled = bool(self._google_cx and self._google_key)
+        
+        # Build the Custom Search client once; static discovery avoids fetching
+        # and parsing the discovery document over the network
+        self._cse_service = None
+        if self.google_pse_enabled:
+            self._cse_service = build(
+                "customsearch", "v1",
+                developerKey=self._google_key,
+                cache_discovery=False,
+                static_discovery=True
+            )
+        
+        # Seconds to wait on SerpAPI before also querying Google PSE in auto mode
+        self.hedge_delay = float(os.getenv("SEARCH_HEDGE_DELAY", "1.0"))
+        
+        # Optional shared result cache; repeat queries skip the external search API
+        self.cache_ttl = int(os.getenv("SEARCH_CACHE_TTL", "3600"))
+        self._redis = None
+        if redis is not None and os.getenv("REDIS_URL"):
+            self._redis = redis.Redis.from_url(os.getenv("REDIS_URL"), socket_timeout=0.5)
         
     def search(self, query: str, engine: str = "auto") -> List[Dict]:
         """
@@ -21,7 +57,42 @@ class WebSearchClient:
         Returns:
             List of search results
         """
+        if self._redis is None:
+            return self._search_uncached(query, engine)
+        
+        key = f"ws:{engine}:{hashlib.sha256(query.encode()).hexdigest()[:32]}"
+        try:
+            cached = self._redis.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        except redis.RedisError as e:
+            print(f"Search cache error: {str(e)}")
+            return self._search_uncached(query, engine)
+        
+        results = self._search_uncached(query, engine)
+        
+        # Empty results usually mean a backend error, so they are not cached
+        if results:
+            try:
+                self._redis.setex(key, self.cache_ttl, json.dumps(results))
+            except redis.RedisError as e:
+                print(f"Search cache error: {str(e)}")
+        return results
+    
+    def _search_uncached(self, query: str, engine: str) -> List[Dict]:
+        """Run the search against the configured backends"""
         if engine == "auto":
+            if self.serpapi_enabled and self.google_pse_enabled:
+                # Give SerpAPI a head start and only spend Google PSE quota when
+                # it comes back empty or is slow enough to be worth hedging
+                serpapi_future = _EXECUTOR.submit(self._search_serpapi, query)
+                try:
+                    results = serpapi_future.result(timeout=self.hedge_delay)
+                except TimeoutError:
+                    google_pse_future = _EXECUTOR.submit(self._search_google_pse, query)
+                    return self._first_non_empty([serpapi_future, google_pse_future])
+                return results or self._search_google_pse(query)
+            
             # Try SerpAPI first, then Google PSE
             if self.serpapi_enabled:
                 results = self._search_serpapi(query)
@@ -41,12 +112,28 @@ class WebSearchClient:
         else:
             return []
     
+    def _first_non_empty(self, futures) -> List[Dict]:
+        """Return the results of whichever search finishes first with any"""
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results = future.result()
+                if results:
+                    # The slower search keeps running in the pool, but nothing waits on it
+                    return results
+        return []
+    
+    async def asearch(self, query: str, engine: str = "auto") -> List[Dict]:
+        """Perform web search in a worker thread so callers can overlap it with other I/O"""
+        return await asyncio.to_thread(self.search, query, engine)
+    
     def _search_serpapi(self, query: str) -> List[Dict]:
         """Search using SerpAPI"""
         try:
             params = {
                 "q": query,
-                "api_key": os.getenv("SERPAPI_API_KEY"),
+                "api_key": self._serpapi_key,
                 "engine": "google",
                 "num": 5
             }
@@ -70,14 +157,9 @@ class WebSearchClient:
     def _search_google_pse(self, query: str) -> List[Dict]:
         """Search using Google Programmable Search Engine"""
         try:
-            service = build(
-                "customsearch", "v1",
-                developerKey=os.getenv("GOOGLE_API_KEY")
-            )
-            
-            result = service.cse().list(
+            result = self._cse_service.cse().list(
                 q=query,
-                cx=os.getenv("GOOGLE_PSE_ID"),
+                cx=self._google_cx,
                 num=5
             ).execute()
             
@@ -1,12 +1,20 @@
 import os
-import requests
-import json
+import importlib.util
+import httpx
+import orjson
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+def _read_api_key(name: str) -> Optional[str]:
+    """Read an API key from the environment, treating blanks and the .env placeholder as unset"""
+    key = (os.getenv(name) or "").strip()
+    if not key or key == "your_api_key_here":
+        return None
+    return key
+
 class ResearchAssistant:
     def __init__(self, default_provider: str = "deepseek"):
         """
@@ -15,37 +23,46 @@ class ResearchAssistant:
         Args:
             default_provider (str): Default AI provider to use ("deepseek", "openai", or "anthropic")
         """
+        deepseek_key = _read_api_key("DEEPSEEK_API_KEY")
+        openai_key = _read_api_key("OPENAI_API_KEY")
+        anthropic_key = _read_api_key("ANTHROPIC_API_KEY")
+        
         self.providers = {
             "deepseek": {
                 "name": "DeepSeek",
-                "api_key": os.getenv("DEEPSEEK_API_KEY"),
+                "api_key": deepseek_key,
                 "api_url": "https://api.deepseek.com/v1/chat/completions",
                 "headers": {
-                    "Authorization": f"Bearer {os.getenv('DEEPSEEK_API_KEY')}",
-                    "Content-Type": "application/json"
+                    "Authorization": f"Bearer {deepseek_key}"
                 }
             },
             "openai": {
                 "name": "OpenAI",
-                "api_key": os.getenv("OPENAI_API_KEY"),
+                "api_key": openai_key,
                 "api_url": "https://api.openai.com/v1/chat/completions",
                 "headers": {
-                    "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
-                    "Content-Type": "application/json"
+                    "Authorization": f"Bearer {openai_key}"
                 }
             },
             "anthropic": {
                 "name": "Anthropic",
-                "api_key": os.getenv("ANTHROPIC_API_KEY"),
+                "api_key": anthropic_key,
                 "api_url": "https://api.anthropic.com/v1/messages",
                 "headers": {
-                    "x-api-key": os.getenv("ANTHROPIC_API_KEY"),
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json"
+                    "x-api-key": anthropic_key,
+                    "anthropic-version": "2023-06-01"
                 }
             }
         }
         
+        # One pooled client for every call so keep-alive (and HTTP/2 multiplexing,
+        # when the h2 package is installed) amortizes connection setup
+        self.session = httpx.Client(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=60.0,
+            headers={"Content-Type": "application/json"}
+        )
+        
         self.default_provider = default_provider
         self.available_providers = self._check_available_providers()
         
@@ -54,11 +71,7 @@ class ResearchAssistant:
     
     def _check_available_providers(self) -> List[str]:
         """Check which providers have valid API keys"""
-        available = []
-        for provider, config in self.providers.items():
-            if config["api_key"] and config["api_key"] != "your_api_key_here":
-                available.append(provider)
-        return available
+        return [provider for provider, config in self.providers.items() if config["api_key"]]
     
     def _call_deepseek(self, query: str) -> str:
         """Call the DeepSeek API with the given query"""
@@ -73,13 +86,13 @@ class ResearchAssistant:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.providers["deepseek"]["api_url"],
                 headers=self.providers["deepseek"]["headers"],
-                json=payload
+                content=orjson.dumps(payload)
             )
             response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
+            return orjson.loads(response.content)["choices"][0]["message"]["content"]
         except Exception as e:
             return f"Error calling DeepSeek API: {str(e)}"
     
@@ -96,13 +109,13 @@ class ResearchAssistant:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.providers["openai"]["api_url"],
                 headers=self.providers["openai"]["headers"],
-                json=payload
+                content=orjson.dumps(payload)
             )
             response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
+            return orjson.loads(response.content)["choices"][0]["message"]["content"]
         except Exception as e:
             return f"Error calling OpenAI API: {str(e)}"
     
@@ -119,13 +132,13 @@ class ResearchAssistant:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.providers["anthropic"]["api_url"],
                 headers=self.providers["anthropic"]["headers"],
-                json=payload
+                content=orjson.dumps(payload)
             )
             response.raise_for_status()
-            return response.json()["content"][0]["text"]
+            return orjson.loads(response.content)["content"][0]["text"]
         except Exception as e:
             return f"Error calling Anthropic API: {str(e)}"
     